@@ -1,3 +1,4 @@
+from example_rest_python.config import EXPORT_DIR
 from example_rest_python.functions import BitwyreRestBot
 from time import sleep
 def cli():
@@ -7,8 +8,12 @@ def cli():
         qty=0.5,
         price_precision=2,
         qty_precision=2,
-        min_spread=0,
+        min_spread=0.001,
         max_spread=0.01,
+        export_dir=EXPORT_DIR,
     )
-    while True:
-        bot.main()
\ No newline at end of file
+    try:
+        while True:
+            bot.main()
+    finally:
+        bot.flush_exports()
\ No newline at end of file
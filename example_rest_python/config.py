@@ -38,6 +38,31 @@ URI_PRIVATE_API_BITWYRE = {
 TIMEOUT = 5
 SLEEP = 5
 
+# Quote manager
+QUOTE_LEVELS = 1
+QUOTE_PRICE_TOLERANCE = 0.001  # relative distance from the target price
+QUOTE_QTY_TOLERANCE = 0.1  # relative distance from the target quantity
+
+# History sync
+HISTORY_PAGE_SIZE = 100
+HISTORY_CURSOR_FILE = "history_cursor.json"
+HISTORY_RECORD_ID = {
+    "TRADE_HISTORY": "execid",
+    "TRANSACTION_HISTORIES": "id",
+    "ORDER_HISTORY": "orderid",
+    "ACCOUNT_STATEMENT": "id",
+}
+
+# Closed order and fill export, a segment is rolled over by row count or age in seconds
+EXPORT_DIR = "export"
+EXPORT_MAX_ROWS = 10000
+EXPORT_MAX_AGE = 60
+EXPORT_FINE_PRECISION = 8  # decimals kept for average and fill prices
+
+# Derivatives cache, seconds between bulk refreshes and before data is stale
+DERIVATIVES_REFRESH_INTERVAL = 1
+DERIVATIVES_MAX_AGE = 5
+
 class OrderSide(Enum):
     Buy = 1
     Sell = 2
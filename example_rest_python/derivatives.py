@@ -0,0 +1,138 @@
+import logging
+import threading
+
+from time import time
+from traceback import format_exc
+
+from example_rest_python.config import (
+    API_KEY,
+    API_SECRET,
+    URL_API_BITWYRE,
+    URI_PUBLIC_API_BITWYRE,
+    URI_PRIVATE_API_BITWYRE,
+    TIMEOUT,
+    DERIVATIVES_REFRESH_INTERVAL,
+)
+from example_rest_python.functions import BitwyreRestBot
+
+logger = logging.getLogger("my_logger")
+
+
+class DerivativesCache:
+    """
+    Derivative info, mark prices and account margin for every futures
+    instrument, refreshed with bulk requests in a background thread.
+
+    Each table is kept as an (entries by instrument, updated_at) snapshot that
+    the refresher replaces in one assignment, so readers never take a lock
+    and never wait on the network. One cache can be shared by many bots.
+    """
+
+    def __init__(
+        self,
+        api_key: str = API_KEY,
+        api_secret: str = API_SECRET,
+        url: str = URL_API_BITWYRE,
+        timeout: int = TIMEOUT,
+        refresh_interval: float = DERIVATIVES_REFRESH_INTERVAL,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+
+        self.infos = ({}, 0.0)
+        self.mark_prices = ({}, 0.0)
+        self.accounts = ({}, 0.0)
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="derivatives-cache", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Exception {e} in refreshing derivatives cache")
+                logger.error(format_exc())
+            self.stop_event.wait(self.refresh_interval)
+
+    def refresh(self):
+        success, result = self.fetch_public("DERIVATIVE_INFO")
+        if success:
+            self.infos = (self.by_instrument(result), time())
+
+        success, result = self.fetch_public("DERIVATIVE_MARK_PRICE")
+        if success:
+            self.mark_prices = (self.by_instrument(result), time())
+
+        success, result = self.fetch_private("DERIVATIVE_ACCOUNT_BALANCE")
+        if success:
+            self.accounts = (self.by_instrument(result), time())
+
+    def fetch_public(self, endpoint: str):
+        uri_path = URI_PUBLIC_API_BITWYRE.get(endpoint)
+        url = self.url + uri_path
+
+        logger.debug(f"Getting {endpoint} from {url}")
+        success, result = BitwyreRestBot.get(url, {}, {}, self.timeout)
+        if not success:
+            logger.error(f"Failed in getting {endpoint}")
+            return (success, result)
+        return (success, result["result"])
+
+    def fetch_private(self, endpoint: str):
+        uri_path = URI_PRIVATE_API_BITWYRE.get(endpoint)
+        payload = ""
+        (nonce, checksum, signature) = BitwyreRestBot.sign(self.api_secret, uri_path, payload)
+
+        headers = {"API-Key": self.api_key, "API-Sign": signature}
+        params = {"nonce": nonce, "checksum": checksum, "payload": payload}
+        url = self.url + uri_path
+
+        logger.debug(f"Sending {params} to {url} with headers {headers}")
+        success, result = BitwyreRestBot.get(url, headers, params, self.timeout)
+        if not success:
+            logger.error(f"Failed in getting {endpoint}")
+            return (success, result)
+        return (success, result["result"])
+
+    @staticmethod
+    def by_instrument(result) -> dict:
+        # Bulk endpoints answer either with a list of entries or a mapping
+        if isinstance(result, dict):
+            return dict(result)
+        return {entry["instrument"]: entry for entry in result if "instrument" in entry}
+
+    def info(self, instrument: str) -> (dict, float):
+        infos, updated_at = self.infos
+        return (infos.get(instrument), updated_at)
+
+    def mark_price(self, instrument: str) -> (str, float):
+        mark_prices, updated_at = self.mark_prices
+        entry = mark_prices.get(instrument)
+        if isinstance(entry, dict):
+            entry = entry.get("mark_price")
+        return (entry, updated_at)
+
+    def account(self, instrument: str) -> (dict, float):
+        accounts, updated_at = self.accounts
+        return (accounts.get(instrument), updated_at)
+
+    @staticmethod
+    def is_fresh(updated_at: float, max_age: float) -> bool:
+        return time() - updated_at <= max_age
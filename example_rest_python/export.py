@@ -0,0 +1,233 @@
+"""
+Columnar export of closed orders and fills.
+
+Closed exec reports and trade history fills are buffered into typed
+columns and written out as immutable segment files, rolled over by row
+count or age. A segment is laid out as
+
+    MAGIC | header length (u32) | JSON header | column blocks
+
+where every column block is 8-byte aligned and holds fixed-width native
+integers scaled by 10 ** the column scale stored in the header. Order prices
+and quantities use the instrument precisions, average and fill prices and
+fees keep EXPORT_FINE_PRECISION decimals. Strings are dictionary-encoded
+into int32 codes with the dictionary kept in the header. ExportReader memory-maps a
+segment and hands out columns as memoryviews without copying.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+
+from array import array
+from time import time, time_ns
+
+from example_rest_python.config import (
+    EXPORT_MAX_ROWS,
+    EXPORT_MAX_AGE,
+    EXPORT_FINE_PRECISION,
+)
+from example_rest_python.pricing import to_ticks
+
+logger = logging.getLogger("my_logger")
+
+MAGIC = b"BWX1"
+SEGMENT_SUFFIX = ".bwx"
+ALIGNMENT = 8
+
+# name, record key, kind, array typecode
+EXEC_REPORT_COLUMNS = (
+    ("timestamp", "timestamp", "int", "q"),
+    ("transacttime", "transacttime", "int", "q"),
+    ("instrument", "instrument", "str", "i"),
+    ("orderid", "orderid", "str", "i"),
+    ("execid", "execid", "str", "i"),
+    ("side", "side", "int", "b"),
+    ("ordtype", "ordtype", "int", "b"),
+    ("ordstatus", "ordstatus", "int", "b"),
+    ("exectype", "exectype", "int", "b"),
+    ("price", "price", "price", "q"),
+    ("avgpx", "AvgPx", "fine", "q"),
+    ("lastpx", "LastPx", "fine", "q"),
+    ("orderqty", "orderqty", "qty", "q"),
+    ("cumqty", "cumqty", "qty", "q"),
+    ("leavesqty", "leavesqty", "qty", "q"),
+    ("lastqty", "LastQty", "qty", "q"),
+)
+
+# TRADE_HISTORY records, one row per fill
+FILL_COLUMNS = (
+    ("timestamp", "timestamp", "int", "q"),
+    ("instrument", "instrument", "str", "i"),
+    ("orderid", "orderid", "str", "i"),
+    ("execid", "execid", "str", "i"),
+    ("side", "side", "int", "b"),
+    ("price", "price", "fine", "q"),
+    ("qty", "qty", "qty", "q"),
+    ("fee", "fee", "fine", "q"),
+    ("fee_asset", "fee_asset", "str", "i"),
+)
+
+
+class SegmentExporter:
+    """
+    Buffer records into the columns of one schema, EXEC_REPORT_COLUMNS for
+    closed orders or FILL_COLUMNS for fills, and write them as segments.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        price_precision: int,
+        qty_precision: int,
+        max_rows: int = EXPORT_MAX_ROWS,
+        max_age: int = EXPORT_MAX_AGE,
+        columns: tuple = EXEC_REPORT_COLUMNS,
+        on_flush=None,
+    ):
+        self.directory = directory
+        self.column_specs = columns
+        self.on_flush = on_flush
+        self.price_precision = price_precision
+        self.qty_precision = qty_precision
+        self.max_rows = max_rows
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+        self.reset()
+
+    def reset(self):
+        self.rows = 0
+        self.opened_at = None
+        self.columns = {name: array(typecode) for name, _, _, typecode in self.column_specs}
+        self.dictionaries = {name: {} for name, _, kind, _ in self.column_specs if kind == "str"}
+
+    def scale(self, kind: str) -> int:
+        if kind == "price":
+            return self.price_precision
+        if kind == "qty":
+            return self.qty_precision
+        if kind == "fine":
+            return EXPORT_FINE_PRECISION
+        return 0
+
+    def encode(self, name: str, kind: str, value) -> int:
+        if kind == "str":
+            dictionary = self.dictionaries[name]
+            return dictionary.setdefault(str(value or ""), len(dictionary))
+        if kind == "int":
+            return int(value or 0)
+        return to_ticks(str(value or 0), self.scale(kind))
+
+    def append(self, report: dict):
+        # The age limit counts from the first row of a segment
+        if self.rows == 0:
+            self.opened_at = time()
+        for name, key, kind, _ in self.column_specs:
+            self.columns[name].append(self.encode(name, kind, report.get(key)))
+        self.rows += 1
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        if self.rows >= self.max_rows or (self.rows > 0 and time() - self.opened_at >= self.max_age):
+            self.flush()
+
+    def flush(self) -> str:
+        if self.rows == 0:
+            return None
+
+        header = {
+            "rows": self.rows,
+            "price_precision": self.price_precision,
+            "qty_precision": self.qty_precision,
+            "columns": [],
+        }
+        blocks = []
+        offset = 0
+        for name, _, kind, typecode in self.column_specs:
+            block = self.columns[name].tobytes()
+            column = {
+                "name": name,
+                "typecode": typecode,
+                "scale": self.scale(kind),
+                "offset": offset,
+                "length": len(block),
+            }
+            if kind == "str":
+                column["dictionary"] = list(self.dictionaries[name])
+            header["columns"].append(column)
+            blocks.append(block + b"\0" * (-len(block) % ALIGNMENT))
+            offset += len(blocks[-1])
+
+        header = json.dumps(header).encode("utf-8")
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % ALIGNMENT)
+
+        path = os.path.join(self.directory, f"{time_ns()}{SEGMENT_SUFFIX}")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for block in blocks:
+                f.write(block)
+        os.replace(tmp_path, path)
+
+        logger.debug(f"Exported {self.rows} rows to {path}")
+        self.reset()
+        if self.on_flush is not None:
+            self.on_flush(path)
+        return path
+
+
+class ExportReader:
+    """
+    Memory-mapped view of one segment. Column memoryviews point straight into
+    the mapping, release them before calling close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.mmap[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an export segment")
+
+        (header_length,) = struct.unpack_from("<I", self.mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(self.mmap[header_start : header_start + header_length]))
+        self.data_start = header_start + header_length
+        self.rows = header["rows"]
+        self.price_precision = header["price_precision"]
+        self.qty_precision = header["qty_precision"]
+        self.columns = {column["name"]: column for column in header["columns"]}
+
+    def column(self, name: str) -> memoryview:
+        # Dictionary-encoded columns return their int32 codes
+        column = self.columns[name]
+        start = self.data_start + column["offset"]
+        return memoryview(self.mmap)[start : start + column["length"]].cast(column["typecode"])
+
+    def scale(self, name: str) -> int:
+        # Stored integers are value * 10 ** scale
+        return self.columns[name]["scale"]
+
+    def dictionary(self, name: str) -> list:
+        return self.columns[name]["dictionary"]
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def list_segments(directory: str) -> list:
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
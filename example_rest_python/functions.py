@@ -2,12 +2,12 @@ import requests
 import json
 import hmac
 import logging
+import os
 
 from decimal import Decimal
 from time import time_ns
 from hashlib import sha256, sha512
 from time import sleep
-from random import choice, uniform, sample
 from traceback import format_exc
 
 from example_rest_python.config import (
@@ -18,9 +18,22 @@ from example_rest_python.config import (
     URI_PRIVATE_API_BITWYRE,
     TIMEOUT,
     SLEEP,
-    OrderSide,
+    QUOTE_LEVELS,
+    EXPORT_MAX_ROWS,
+    EXPORT_MAX_AGE,
+    DERIVATIVES_MAX_AGE,
     OrderStatus,
 )
+from example_rest_python.export import SegmentExporter, FILL_COLUMNS
+from example_rest_python.history import HistoryCursor, HistorySync
+from example_rest_python.pricing import (
+    ask_ticks,
+    bid_ticks,
+    mid_ticks,
+    to_ppm,
+    to_ticks,
+)
+from example_rest_python.quotes import QuoteManager
 
 logger = logging.getLogger("my_logger")
 logger.setLevel(logging.DEBUG)  # Set the desired logging level
@@ -47,6 +60,10 @@ class BitwyreRestBot:
         qty_precision: int,
         min_spread: Decimal,
         max_spread: Decimal,
+        quote_levels: int = QUOTE_LEVELS,
+        export_dir: str = None,
+        leverage: int = 1,
+        derivatives_cache=None,
     ):
         logger.debug("Starting BitwyreRestBot")
 
@@ -70,8 +87,8 @@ class BitwyreRestBot:
         self.closed_asks = []
 
         # enums
-        self.order_sides = [side.value for side in OrderSide]
         self.closed_status = [
+            OrderStatus.Filled.value,
             OrderStatus.DoneForToday.value,
             OrderStatus.Cancelled.value,
             OrderStatus.Replaced.value,
@@ -79,41 +96,157 @@ class BitwyreRestBot:
             OrderStatus.Rejected.value,
             OrderStatus.Suspended.value,
             OrderStatus.Expired.value,
-            OrderStatus.Stopped.value,
         ]
 
-        # configs
-        self.mid_price = mid_price
+        # configs, prices and quantities are kept as integer ticks/lots
         self.price_precision = price_precision
         self.qty_precision = qty_precision
-        self.qty = qty
-        self.min_spread = min_spread
-        self.max_spread = max_spread
+        self.mid_ticks = to_ticks(str(mid_price), price_precision)
+        self.qty_lots = to_ticks(str(qty), qty_precision)
+        self.min_spread_ppm = to_ppm(min_spread)
+        self.max_spread_ppm = to_ppm(max_spread)
+        self.quote_levels = quote_levels
+
+        self.quote_manager = QuoteManager(self)
+
+        # Futures pricing and leverage read from a shared DerivativesCache
+        self.leverage = leverage
+        self.derivatives_cache = derivatives_cache
+        if self.derivatives_cache is not None:
+            self.derivatives_cache.start()
+
+        # Closed orders and trade history fills are exported to columnar
+        # segments when export_dir is set
+        self.exporter = None
+        self.fill_exporter = None
+        self.fill_cursor = None
+        if export_dir is not None:
+            self.exporter = SegmentExporter(
+                directory=os.path.join(export_dir, "orders"),
+                price_precision=price_precision,
+                qty_precision=qty_precision,
+                max_rows=EXPORT_MAX_ROWS,
+                max_age=EXPORT_MAX_AGE,
+            )
+            # The fill cursor is only persisted once the fills are on disk
+            self.fill_cursor = HistoryCursor(os.path.join(export_dir, "fills_cursor.json"), autosave=False)
+            self.fill_exporter = SegmentExporter(
+                directory=os.path.join(export_dir, "fills"),
+                price_precision=price_precision,
+                qty_precision=qty_precision,
+                max_rows=EXPORT_MAX_ROWS,
+                max_age=EXPORT_MAX_AGE,
+                columns=FILL_COLUMNS,
+                on_flush=lambda path: self.fill_cursor.save(),
+            )
 
     def main(self):
-        self.randomize_order()
-        sleep(self.sleep)
-
         self.update_orders()
         sleep(self.sleep)
 
-        self.random_cancel()
+        self.requote()
         sleep(self.sleep)
 
-    def random_cancel(self):
-        # delete random order to be cancelled
-        order_tobe_cancelled = sample(
-            self.open_bids, min(0, len(self.open_bids))
-        ) + sample(self.open_asks, min(0, len(self.open_asks)))
-
-        for order in order_tobe_cancelled:
-            self.cancel_order(order_id=order["orderid"], qty="-1")  # cancel all qty
+        if self.exporter is not None:
+            self.export_fills()
+            self.exporter.flush_if_due()
+            self.fill_exporter.flush_if_due()
+
+    def flush_exports(self):
+        # Write out buffered rows, callers flush once they stop calling main
+        if self.exporter is not None:
+            self.exporter.flush()
+            self.fill_exporter.flush()
+
+    def export_fills(self):
+        # Stream the fills since the last sync into the fill exporter
+        for fill in self.trade_history(self.fill_cursor):
+            self.fill_exporter.append(fill)
+
+    def mark_price_ticks(self) -> int:
+        # Fresh mark price of a futures instrument in ticks, None otherwise
+        if self.product != "futures" or self.derivatives_cache is None:
+            return None
+        mark_price, updated_at = self.derivatives_cache.mark_price(self.instrument)
+        if mark_price is None or not self.derivatives_cache.is_fresh(updated_at, DERIVATIVES_MAX_AGE):
+            return None
+        return to_ticks(str(mark_price), self.price_precision)
+
+    def choose_leverage(self) -> int:
+        if self.product != "futures":
+            return 1  # spot leverage is 1
+        leverage = self.leverage
+        if self.derivatives_cache is None:
+            return leverage
+
+        # Stay on the leverage of an open position, capped by the instrument limit
+        account, updated_at = self.derivatives_cache.account(self.instrument)
+        if account is not None and self.derivatives_cache.is_fresh(updated_at, DERIVATIVES_MAX_AGE):
+            leverage = self.parse_leverage(account.get("leverage", leverage))
+        info, updated_at = self.derivatives_cache.info(self.instrument)
+        if info is not None and self.derivatives_cache.is_fresh(updated_at, DERIVATIVES_MAX_AGE):
+            leverage = min(leverage, self.parse_leverage(info.get("max_leverage", leverage)))
+        return max(1, leverage)
+
+    def parse_leverage(self, value) -> int:
+        # Leverage comes from the API unvalidated, e.g. "5.0"
+        try:
+            return int(Decimal(str(value)))
+        except (ArithmeticError, ValueError, TypeError):
+            logger.error(f"Invalid leverage {value} for {self.instrument}, using {self.leverage}")
+            return self.leverage
+
+    def is_closed(self, order: dict) -> bool:
+        leaves_lots = to_ticks(order["leavesqty"], self.qty_precision)
+        return order["ordstatus"] in self.closed_status or leaves_lots == 0
+
+    def prune_closed_orders(self):
+        # Move orders that are done out of the live lists
+        for open_orders, closed_orders in (
+            (self.open_bids, self.closed_bids),
+            (self.open_asks, self.closed_asks),
+        ):
+            for order in [order for order in open_orders if self.is_closed(order)]:
+                open_orders.remove(order)
+                self.archive_order(order, closed_orders)
+
+    def archive_order(self, order: dict, closed_orders: list):
+        closed_orders.append(order)
+        if self.exporter is not None:
+            self.exporter.append(order)
+
+    def requote(self):
+        # Done orders must not feed the mid price or the diff
+        self.prune_closed_orders()
+
+        # Read the mark price once so the check and the quotes agree
+        mark_price = self.mark_price_ticks()
+        if self.product == "futures" and mark_price is None:
+            logger.warning(f"No fresh mark price for {self.instrument}, skipping quotes")
+            return
+        bids, asks = self.build_quotes(mark_price)
+        self.quote_manager.sync(bids=bids, asks=asks)
+
+    def build_quotes(self, mark_price: int = None) -> (list, list):
+        # Target levels spread evenly from min to max spread around the mid,
+        # a single level quotes at min spread
+        bids = []
+        asks = []
+        self.mid_ticks = self.calculate_midprice(mark_price)
+        spread_range = self.max_spread_ppm - self.min_spread_ppm
+        steps = max(self.quote_levels - 1, 1)
+
+        for level in range(self.quote_levels):
+            spread = self.min_spread_ppm + spread_range * level // steps
+            bids.append((bid_ticks(self.mid_ticks, spread), self.qty_lots))
+            asks.append((ask_ticks(self.mid_ticks, spread), self.qty_lots))
+        return (bids, asks)
 
     def update_orders(self):
         updated_bids = []
         updated_asks = []
         bids_ids = [order["orderid"] for order in self.open_bids]
-        bids_ask = [order["orderid"] for order in self.open_bids]
+        bids_ask = [order["orderid"] for order in self.open_asks]
 
         # fetch order infos
         for order_id in bids_ids:
@@ -151,7 +284,7 @@ class BitwyreRestBot:
                     order_id == updated_order_id
                     and updated_order_status in self.closed_status
                 ):
-                    self.closed_bids.append(updated_order)
+                    self.archive_order(updated_order, self.closed_bids)
                     del self.open_bids[index]
                     break
 
@@ -178,41 +311,9 @@ class BitwyreRestBot:
                 ):
                     # Delete order if its already closed
                     del self.open_asks[index]
-                    self.closed_asks.append(updated_order)
+                    self.archive_order(updated_order, self.closed_asks)
                     break
 
-    def randomize_order(self):
-        ordtype = 2  # limit order
-        leverage = 1  # spot leverage is 1
-        side = choice(self.order_sides)  # pick random side
-        price = self.decim(round(self.mid_price, self.price_precision))
-        qty = self.decim(round(self.qty, self.qty_precision))
-
-        if len(self.open_bids + self.open_asks) == 0:
-            # No open order, post original price
-            return self.create_order(
-                side=side,
-                ordtype=ordtype,
-                orderqty=str(qty),
-                price=str(price),
-                leverage=leverage,
-            )
-
-        self.mid_price = self.calculate_midprice()
-        if side == OrderSide.Buy.value:
-            price = self.mid_price * self.decim(1 - uniform(self.min_spread, self.max_spread))
-        else:
-            price = self.mid_price * self.decim(1 + uniform(self.min_spread, self.max_spread))
-
-        price = self.decim(round(price, self.price_precision))
-        return self.create_order(
-            side=side,
-            ordtype=ordtype,
-            orderqty=str(qty),
-            price=str(price),
-            leverage=leverage,
-        )
-
     def create_order(
         self,
         side: int,
@@ -317,9 +418,9 @@ class BitwyreRestBot:
         else:
             # closed orders
             if side == 1:
-                self.closed_bids.append(result)
+                self.archive_order(result, self.closed_bids)
             elif side == 2:
-                self.closed_asks.append(result)
+                self.archive_order(result, self.closed_asks)
         return
 
     def order_info(
@@ -349,6 +450,46 @@ class BitwyreRestBot:
         result = result["result"][0]
         return (success, result)
 
+    def fetch_history(self, history_type: str, from_time: int, limit: int, offset: int = 0):
+        success: bool = False
+        result: list = []
+        logger.debug(f"Getting {history_type} from {from_time} offset {offset}")
+        uri_path = URI_PRIVATE_API_BITWYRE.get(history_type)
+        payload = {
+            "instrument": self.instrument,
+            "from_time": from_time,
+            "count": limit,
+            "offset": offset,
+        }
+        payload = json.dumps(payload)
+
+        (nonce, checksum, signature) = self.sign(self.api_secret, uri_path, payload)
+        headers = {"API-Key": self.api_key, "API-Sign": signature}
+        params = {"nonce": nonce, "checksum": checksum, "payload": payload}
+        url = self.url + uri_path
+
+        logger.debug(f"Sending {params} to {url} with headers {headers}")
+        success, result = self.get(url, headers, params, self.timeout)
+
+        if not success:
+            logger.error(f"Failed in getting {history_type}")
+            return (success, [])
+
+        result = result["result"]
+        return (success, result)
+
+    def trade_history(self, cursor: HistoryCursor = None) -> HistorySync:
+        return HistorySync(self, "TRADE_HISTORY", cursor)
+
+    def transaction_histories(self, cursor: HistoryCursor = None) -> HistorySync:
+        return HistorySync(self, "TRANSACTION_HISTORIES", cursor)
+
+    def order_history(self, cursor: HistoryCursor = None) -> HistorySync:
+        return HistorySync(self, "ORDER_HISTORY", cursor)
+
+    def account_statement(self, cursor: HistoryCursor = None) -> HistorySync:
+        return HistorySync(self, "ACCOUNT_STATEMENT", cursor)
+
     def cancel_order(self, order_id: str, qty: str):
         success: bool = False
         result: dict = {}
@@ -479,6 +620,7 @@ class BitwyreRestBot:
         success = True
         return (success, result)
 
+    @staticmethod
     def delete(url: str, headers: dict, params: dict, timeout: int):
         success: bool = False
         response: requests.Response = None
@@ -487,8 +629,8 @@ class BitwyreRestBot:
         error: dict = []
 
         try:
-            response = requests.get(
-                url - url,
+            response = requests.delete(
+                url=url,
                 headers=headers,
                 params=params,
                 timeout=timeout,
@@ -532,22 +674,23 @@ class BitwyreRestBot:
         success = True
         return (success, result)
 
-    def calculate_midprice(self) -> Decimal:
-        midprice: Decimal = None
+    def calculate_midprice(self, mark_price: int = None) -> int:
+        # Mid price in ticks, order price strings are parsed once and cached
+        midprice: int = None
+        if mark_price is not None:
+            # Futures quote around the mark price
+            return mark_price
+
         if len(self.open_bids) > 0 and len(self.open_asks) > 0:
-            best_bid = max(float(buy_order["price"]) for buy_order in self.open_bids)
-            best_ask = min(float(sell_order["price"]) for sell_order in self.open_asks)
-            midprice = self.decim((best_bid + best_ask) / 2)
+            best_bid = max(to_ticks(buy_order["price"], self.price_precision) for buy_order in self.open_bids)
+            best_ask = min(to_ticks(sell_order["price"], self.price_precision) for sell_order in self.open_asks)
+            midprice = mid_ticks(best_bid, best_ask)
         elif len(self.open_bids) > 0 and len(self.open_asks) == 0:
-            midprice = self.decim(
-                max(float(buy_order["price"]) for buy_order in self.open_bids)
-            )
+            midprice = max(to_ticks(buy_order["price"], self.price_precision) for buy_order in self.open_bids)
         elif len(self.open_asks) > 0 and len(self.open_bids) == 0:
-            midprice = self.decim(
-                min(float(sell_order["price"]) for sell_order in self.open_asks)
-            )
+            midprice = min(to_ticks(sell_order["price"], self.price_precision) for sell_order in self.open_asks)
         else:
-            midprice = self.decim(self.mid_price)
+            midprice = self.mid_ticks
         return midprice
 
     @staticmethod
@@ -565,7 +708,3 @@ class BitwyreRestBot:
             sha512,
         ).hexdigest()
         return (nonce, checksum, signature)
-
-    @staticmethod
-    def decim(num):
-        return Decimal(str(num))
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+from example_rest_python.config import (
+    HISTORY_PAGE_SIZE,
+    HISTORY_CURSOR_FILE,
+    HISTORY_RECORD_ID,
+)
+
+logger = logging.getLogger("my_logger")
+
+
+class HistoryCursor:
+    """
+    Persisted sync position for every history endpoint.
+
+    For each key the last synced timestamp is stored together with the ids of
+    the records seen at exactly that timestamp, so the next run can request
+    from that timestamp inclusively without yielding those records twice.
+    Without autosave the position is only written by an explicit save(), so
+    a consumer can persist it once the records are safely stored.
+    """
+
+    def __init__(self, path: str = HISTORY_CURSOR_FILE, autosave: bool = True):
+        self.path = path
+        self.autosave = autosave
+        self.cursors = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.cursors = json.load(f)
+
+    def get(self, key: str) -> (int, set):
+        cursor = self.cursors.get(key, {})
+        return (int(cursor.get("timestamp", 0)), set(cursor.get("ids", [])))
+
+    def set(self, key: str, timestamp: int, ids: set):
+        self.cursors[key] = {"timestamp": timestamp, "ids": sorted(ids)}
+        if self.autosave:
+            self.save()
+
+    def save(self):
+        # Write to a temporary file first so a crash never leaves a torn cursor
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cursors, f)
+        os.replace(tmp_path, self.path)
+
+
+class HistorySync:
+    """
+    Lazy iterator over one private history endpoint.
+
+    Pages are requested from the persisted cursor timestamp inclusively and
+    records already seen at that timestamp are dropped by id, so records
+    added later at the cursor timestamp are still picked up. An offset is
+    only used to page past a full page of already seen records. The next
+    page is fetched in a background thread while the current one is being
+    consumed, so at most two pages are held in memory. The cursor is saved
+    once a page has been fully consumed, so records are delivered at least
+    once.
+    """
+
+    def __init__(
+        self,
+        bot,
+        history_type: str,
+        cursor: HistoryCursor = None,
+        page_size: int = HISTORY_PAGE_SIZE,
+    ):
+        self.bot = bot
+        self.history_type = history_type
+        self.record_id = HISTORY_RECORD_ID[history_type]
+        self.cursor = cursor if cursor is not None else HistoryCursor()
+        self.page_size = page_size
+        self.key = f"{history_type}:{bot.instrument}"
+
+    def __iter__(self):
+        timestamp, seen_ids = self.cursor.get(self.key)
+        offset = 0
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(
+                self.bot.fetch_history, self.history_type, timestamp, self.page_size, offset
+            )
+            while pending is not None:
+                success, records = pending.result()
+                pending = None
+                if not success:
+                    logger.error(f"Stopped syncing {self.key} at {timestamp}")
+                    return
+
+                records.sort(key=lambda record: int(record["timestamp"]))
+                new_records = [
+                    record
+                    for record in records
+                    if int(record["timestamp"]) > timestamp
+                    or str(record[self.record_id]) not in seen_ids
+                ]
+
+                if len(new_records) > 0:
+                    last_timestamp = int(new_records[-1]["timestamp"])
+                    last_ids = {
+                        str(record[self.record_id])
+                        for record in new_records
+                        if int(record["timestamp"]) == last_timestamp
+                    }
+                    if last_timestamp == timestamp:
+                        last_ids |= seen_ids
+                    timestamp, seen_ids = last_timestamp, last_ids
+
+                if len(records) >= self.page_size:
+                    # Only page past a full page of records that were all seen
+                    offset = 0 if len(new_records) > 0 else offset + self.page_size
+                    pending = executor.submit(
+                        self.bot.fetch_history, self.history_type, timestamp, self.page_size, offset
+                    )
+
+                for record in new_records:
+                    yield record
+
+                self.cursor.set(self.key, timestamp, seen_ids)
@@ -0,0 +1,48 @@
+"""
+Fixed-point pricing core.
+
+Prices and quantities are integer ticks/lots scaled by 10 ** precision, so
+1 tick of btc_usdt_spot with price_precision 2 is 0.01 usdt. Spreads and
+tolerances are integer parts per million. Everything in between runs in
+integer math and strings are only produced for the wire.
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+from functools import lru_cache
+
+PPM = 1_000_000
+
+
+@lru_cache(maxsize=4096)
+def to_ticks(value: str, precision: int) -> int:
+    # The same price strings come back on every pass, parse each only once
+    return int(Decimal(value).scaleb(precision).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_ticks(ticks: int, precision: int) -> str:
+    sign = "-" if ticks < 0 else ""
+    units, fraction = divmod(abs(ticks), 10**precision)
+    if precision == 0:
+        return f"{sign}{units}"
+    return f"{sign}{units}.{fraction:0{precision}d}"
+
+
+def to_ppm(ratio) -> int:
+    return int(Decimal(str(ratio)).scaleb(6).to_integral_value(ROUND_HALF_EVEN))
+
+
+def mid_ticks(bid_ticks: int, ask_ticks: int) -> int:
+    return (bid_ticks + ask_ticks) // 2
+
+
+def bid_ticks(mid: int, spread_ppm: int) -> int:
+    # Round bids down and asks up so the spread is never narrower than asked
+    return mid * (PPM - spread_ppm) // PPM
+
+
+def ask_ticks(mid: int, spread_ppm: int) -> int:
+    return -(-mid * (PPM + spread_ppm) // PPM)
+
+
+def within(value: int, target: int, tolerance_ppm: int) -> bool:
+    return abs(value - target) * PPM <= abs(target) * tolerance_ppm
@@ -0,0 +1,93 @@
+import logging
+
+from example_rest_python.config import (
+    QUOTE_PRICE_TOLERANCE,
+    QUOTE_QTY_TOLERANCE,
+    OrderSide,
+    OrderType,
+)
+from example_rest_python.pricing import from_ticks, to_ppm, to_ticks, within
+
+logger = logging.getLogger("my_logger")
+
+
+class QuoteManager:
+    """
+    Keep the live orders of a bot in line with a target quote set.
+
+    Every sync diffs the desired (price ticks, qty lots) levels of each side
+    against the bot's open orders. Orders within the price/size tolerance of
+    a level are left in place, every other order is cancelled and only the
+    levels left uncovered are created.
+    """
+
+    def __init__(
+        self,
+        bot,
+        price_tolerance: float = QUOTE_PRICE_TOLERANCE,
+        qty_tolerance: float = QUOTE_QTY_TOLERANCE,
+    ):
+        self.bot = bot
+        self.price_tolerance_ppm = to_ppm(price_tolerance)
+        self.qty_tolerance_ppm = to_ppm(qty_tolerance)
+
+        # Cancels are sent but the order stays in the open list until
+        # update_orders sees it closed, don't diff against it meanwhile
+        self.pending_cancels = set()
+
+    def order_ticks(self, order: dict) -> int:
+        return to_ticks(order["price"], self.bot.price_precision)
+
+    def order_lots(self, order: dict) -> int:
+        return to_ticks(order["leavesqty"], self.bot.qty_precision)
+
+    def matches(self, order: dict, price: int, qty: int) -> bool:
+        return within(self.order_ticks(order), price, self.price_tolerance_ppm) and within(
+            self.order_lots(order), qty, self.qty_tolerance_ppm
+        )
+
+    def diff(self, desired: list, live: list) -> (list, list, list):
+        keep = []
+        creates = []
+        unmatched = [order for order in live if order["orderid"] not in self.pending_cancels]
+
+        for price, qty in desired:
+            candidates = [order for order in unmatched if self.matches(order, price, qty)]
+            if len(candidates) == 0:
+                creates.append((price, qty))
+                continue
+            closest = min(candidates, key=lambda order: abs(self.order_ticks(order) - price))
+            unmatched.remove(closest)
+            keep.append(closest)
+
+        cancels = unmatched
+        return (keep, creates, cancels)
+
+    def sync(self, bids: list, asks: list):
+        self.bot.prune_closed_orders()
+        open_ids = {order["orderid"] for order in self.bot.open_bids + self.bot.open_asks}
+        self.pending_cancels &= open_ids
+
+        for side, desired, live in (
+            (OrderSide.Buy.value, bids, self.bot.open_bids),
+            (OrderSide.Sell.value, asks, self.bot.open_asks),
+        ):
+            keep, creates, cancels = self.diff(desired, list(live))
+            logger.debug(
+                f"Side {side}: keeping {len(keep)}, creating {len(creates)}, cancelling {len(cancels)}"
+            )
+
+            # Cancel first so the freed balance is available for the creates
+            for order in cancels:
+                success, _ = self.bot.cancel_order(order_id=order["orderid"], qty="-1")  # cancel all qty
+                if success:
+                    self.pending_cancels.add(order["orderid"])
+
+            for price, qty in creates:
+                self.bot.create_order(
+                    side=side,
+                    ordtype=OrderType.Limit.value,
+                    orderqty=from_ticks(qty, self.bot.qty_precision),
+                    price=from_ticks(price, self.bot.price_precision),
+                    leverage=self.bot.choose_leverage(),
+                )
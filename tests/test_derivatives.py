@@ -0,0 +1,118 @@
+from time import sleep, time
+
+from example_rest_python.derivatives import DerivativesCache
+from example_rest_python.functions import BitwyreRestBot
+
+INSTRUMENT = "btc_usdt_futures"
+
+
+def make_cache(responses):
+    cache = DerivativesCache(refresh_interval=3600)
+    cache.fetch_public = lambda endpoint: responses.get(endpoint, (False, {}))
+    cache.fetch_private = lambda endpoint: responses.get(endpoint, (False, {}))
+    return cache
+
+
+def futures_bot(cache):
+    bot = BitwyreRestBot(INSTRUMENT, 30000, 0.5, 2, 2, 0.001, 0.01, leverage=5, derivatives_cache=cache)
+    # The bot starts the cache, stop it so the tests drive refresh() themselves
+    cache.stop()
+    bot.created = []
+    bot.create_order = lambda **order: bot.created.append(order)
+    return bot
+
+
+def test_by_instrument_accepts_lists_and_mappings():
+    entry = {"instrument": INSTRUMENT, "mark_price": "31000"}
+    assert DerivativesCache.by_instrument([entry, {"no": "instrument"}]) == {INSTRUMENT: entry}
+    assert DerivativesCache.by_instrument({INSTRUMENT: "31000"}) == {INSTRUMENT: "31000"}
+
+
+def test_refresh_fills_every_snapshot():
+    cache = make_cache(
+        {
+            "DERIVATIVE_INFO": (True, [{"instrument": INSTRUMENT, "max_leverage": "20"}]),
+            "DERIVATIVE_MARK_PRICE": (True, [{"instrument": INSTRUMENT, "mark_price": "31000.5"}]),
+            "DERIVATIVE_ACCOUNT_BALANCE": (True, {INSTRUMENT: {"leverage": "10"}}),
+        }
+    )
+    cache.refresh()
+
+    mark_price, updated_at = cache.mark_price(INSTRUMENT)
+    assert mark_price == "31000.5"
+    assert cache.is_fresh(updated_at, 5)
+    assert cache.info(INSTRUMENT)[0]["max_leverage"] == "20"
+    assert cache.account(INSTRUMENT)[0]["leverage"] == "10"
+    assert cache.mark_price("eth_usdt_futures")[0] is None
+
+
+def test_mark_price_reads_plain_values():
+    cache = make_cache({"DERIVATIVE_MARK_PRICE": (True, {INSTRUMENT: "31000"})})
+    cache.refresh()
+    assert cache.mark_price(INSTRUMENT)[0] == "31000"
+
+
+def test_refresh_keeps_previous_snapshot_on_failure():
+    responses = {"DERIVATIVE_MARK_PRICE": (True, [{"instrument": INSTRUMENT, "mark_price": "31000"}])}
+    cache = make_cache(responses)
+    cache.refresh()
+    snapshot = cache.mark_prices
+
+    responses["DERIVATIVE_MARK_PRICE"] = (False, {})
+    cache.refresh()
+    assert cache.mark_prices is snapshot
+
+
+def test_start_refreshes_in_background_and_stop_joins():
+    cache = make_cache({"DERIVATIVE_MARK_PRICE": (True, [{"instrument": INSTRUMENT, "mark_price": "31000"}])})
+    cache.start()
+    thread = cache.thread
+    for _ in range(100):
+        if cache.mark_price(INSTRUMENT)[0] is not None:
+            break
+        sleep(0.01)
+    cache.stop()
+
+    assert not thread.is_alive()
+    assert cache.thread is None
+    assert cache.mark_price(INSTRUMENT)[0] == "31000"
+
+
+def test_futures_quote_around_fresh_mark_price():
+    cache = make_cache({"DERIVATIVE_MARK_PRICE": (True, [{"instrument": INSTRUMENT, "mark_price": "31000"}])})
+    bot = futures_bot(cache)
+    cache.refresh()
+    bot.requote()
+    assert [order["price"] for order in bot.created] == ["30969.00", "31031.00"]
+    assert {order["leverage"] for order in bot.created} == {5}
+
+
+def test_futures_skip_quoting_on_stale_mark_price():
+    cache = make_cache({})
+    bot = futures_bot(cache)
+    cache.mark_prices = ({INSTRUMENT: {"mark_price": "31000"}}, time() - 3600)
+    bot.requote()
+    assert bot.created == []
+
+
+def test_futures_requote_reads_the_mark_price_once():
+    bot = futures_bot(make_cache({}))
+    marks = [3100000]
+    bot.mark_price_ticks = lambda: marks.pop() if marks else None
+    bot.requote()
+    assert [order["price"] for order in bot.created] == ["30969.00", "31031.00"]
+
+
+def test_choose_leverage_parses_api_values():
+    cache = make_cache(
+        {
+            "DERIVATIVE_INFO": (True, [{"instrument": INSTRUMENT, "max_leverage": "20.0"}]),
+            "DERIVATIVE_ACCOUNT_BALANCE": (True, [{"instrument": INSTRUMENT, "leverage": "25.0"}]),
+        }
+    )
+    bot = futures_bot(cache)
+    cache.refresh()
+    assert bot.choose_leverage() == 20
+
+    cache.accounts = ({INSTRUMENT: {"leverage": "lots"}}, time())
+    assert bot.choose_leverage() == 5
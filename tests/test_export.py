@@ -0,0 +1,107 @@
+import example_rest_python.export as export
+from example_rest_python.functions import BitwyreRestBot
+from example_rest_python.export import SegmentExporter, ExportReader, list_segments
+
+
+def report(index):
+    return {
+        "timestamp": 1700000000000000000 + index,
+        "instrument": "btc_usdt_spot",
+        "orderid": f"order-{index % 2}",
+        "side": 1 + index % 2,
+        "ordstatus": 2,
+        "price": "30000.12",
+        "AvgPx": "30000.123456",
+        "orderqty": "0.5",
+        "cumqty": "0.5",
+        "leavesqty": "0",
+    }
+
+
+def test_segment_round_trip(tmp_path):
+    exporter = SegmentExporter(str(tmp_path), price_precision=2, qty_precision=4, max_rows=3)
+    for index in range(4):
+        exporter.append(report(index))
+    exporter.flush()
+
+    segments = list_segments(str(tmp_path))
+    assert len(segments) == 2
+
+    with ExportReader(segments[0]) as reader:
+        assert reader.rows == 3
+        timestamp = reader.column("timestamp")
+        price = reader.column("price")
+        avgpx = reader.column("avgpx")
+        orderid = reader.column("orderid")
+        side = reader.column("side")
+        cumqty = reader.column("cumqty")
+
+        assert timestamp.tolist() == [1700000000000000000 + index for index in range(3)]
+        assert price.tolist() == [3000012] * 3
+        assert reader.scale("avgpx") == 8
+        assert avgpx.tolist() == [3000012345600] * 3
+        assert [reader.dictionary("orderid")[code] for code in orderid] == ["order-0", "order-1", "order-0"]
+        assert side.tolist() == [1, 2, 1]
+        assert reader.scale("cumqty") == 4
+        assert cumqty.tolist() == [5000] * 3
+
+        for view in (timestamp, price, avgpx, orderid, side, cumqty):
+            view.release()
+
+    with ExportReader(segments[1]) as reader:
+        assert reader.rows == 1
+        assert reader.dictionary("orderid") == ["order-1"]
+
+
+def test_fills_are_exported_before_the_cursor_is_saved(tmp_path):
+    fills = [
+        {
+            "timestamp": index,
+            "instrument": "btc_usdt_spot",
+            "orderid": "order-0",
+            "execid": f"exec-{index}",
+            "side": 1,
+            "price": "30000.123456",
+            "qty": "0.25",
+            "fee": "0.0001",
+            "fee_asset": "btc",
+        }
+        for index in range(3)
+    ]
+    bot = BitwyreRestBot("btc_usdt_spot", 30000, 0.5, 2, 2, 0.001, 0.01, export_dir=str(tmp_path))
+    bot.fetch_history = lambda history_type, from_time, limit, offset=0: (
+        True,
+        [fill for fill in fills if fill["timestamp"] >= from_time][offset : offset + limit],
+    )
+
+    bot.export_fills()
+    assert not (tmp_path / "fills_cursor.json").exists()
+
+    bot.fill_exporter.flush()
+    assert (tmp_path / "fills_cursor.json").exists()
+
+    with ExportReader(list_segments(str(tmp_path / "fills"))[0]) as reader:
+        price = reader.column("price")
+        qty = reader.column("qty")
+        assert reader.rows == 3
+        assert price.tolist() == [3000012345600] * 3
+        assert qty.tolist() == [25] * 3
+        assert reader.dictionary("execid") == ["exec-0", "exec-1", "exec-2"]
+        price.release()
+        qty.release()
+
+
+def test_age_limit_counts_from_first_buffered_row(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(export, "time", lambda: now[0])
+    exporter = SegmentExporter(str(tmp_path), price_precision=2, qty_precision=4, max_age=60)
+
+    for index in range(3):
+        now[0] += 20
+        exporter.append(report(index))
+    assert list_segments(str(tmp_path)) == []
+
+    now[0] += 60
+    exporter.flush_if_due()
+    with ExportReader(list_segments(str(tmp_path))[0]) as reader:
+        assert reader.rows == 3
@@ -0,0 +1,54 @@
+from example_rest_python.history import HistoryCursor, HistorySync
+
+
+class FakeBot:
+    instrument = "btc_usdt_spot"
+
+    def __init__(self, records):
+        self.records = records
+
+    def fetch_history(self, history_type, from_time, limit, offset=0):
+        records = [record for record in self.records if record["timestamp"] >= from_time]
+        return (True, [dict(record) for record in records[offset : offset + limit]])
+
+
+def fill(timestamp, execid):
+    return {"timestamp": timestamp, "execid": str(execid)}
+
+
+def sync(bot, path, page_size=5):
+    history = HistorySync(bot, "TRADE_HISTORY", HistoryCursor(str(path)), page_size=page_size)
+    return [record["execid"] for record in history]
+
+
+def test_sync_yields_every_record_once(tmp_path):
+    bot = FakeBot([fill(i // 3, i) for i in range(23)])
+    assert sync(bot, tmp_path / "cursor.json") == [str(i) for i in range(23)]
+
+
+def test_sync_resumes_from_cursor(tmp_path):
+    path = tmp_path / "cursor.json"
+    bot = FakeBot([fill(i // 3, i) for i in range(10)])
+    sync(bot, path)
+
+    bot.records += [fill(3, 10), fill(4, 11)]
+    assert sync(bot, path) == ["10", "11"]
+    assert sync(bot, path) == []
+
+
+def test_sync_pages_through_records_sharing_a_timestamp(tmp_path):
+    path = tmp_path / "cursor.json"
+    bot = FakeBot([fill(1, i) for i in range(8)])
+    assert sync(bot, path) == [str(i) for i in range(8)]
+
+    bot.records += [fill(1, i) for i in range(8, 14)] + [fill(2, 14)]
+    assert sync(bot, path) == [str(i) for i in range(8, 15)]
+
+
+def test_sync_picks_up_records_added_at_the_cursor_timestamp(tmp_path):
+    path = tmp_path / "cursor.json"
+    bot = FakeBot([fill(5, "b"), fill(5, "c")])
+    assert sync(bot, path) == ["b", "c"]
+
+    bot.records = [fill(5, "a"), fill(5, "b"), fill(5, "c"), fill(6, "d")]
+    assert sync(bot, path) == ["a", "d"]
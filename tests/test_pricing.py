@@ -0,0 +1,48 @@
+from example_rest_python.pricing import (
+    ask_ticks,
+    bid_ticks,
+    from_ticks,
+    mid_ticks,
+    to_ppm,
+    to_ticks,
+    within,
+)
+
+
+def test_to_ticks_scales_and_rounds_half_even():
+    assert to_ticks("30000.12", 2) == 3000012
+    assert to_ticks("30000", 2) == 3000000
+    assert to_ticks("0.125", 2) == 12
+    assert to_ticks("0.135", 2) == 14
+    assert to_ticks("-1.5", 0) == -2
+
+
+def test_from_ticks_pads_fraction():
+    assert from_ticks(3000012, 2) == "30000.12"
+    assert from_ticks(5, 4) == "0.0005"
+    assert from_ticks(-105, 2) == "-1.05"
+    assert from_ticks(42, 0) == "42"
+
+
+def test_ticks_round_trip():
+    for value in ("0.01", "1.00", "29999.99", "123456.78"):
+        assert from_ticks(to_ticks(value, 2), 2) == value
+
+
+def test_spread_never_narrower_than_requested():
+    mid = 3000001
+    spread = to_ppm(0.001)
+    assert spread == 1000
+    assert bid_ticks(mid, spread) == 2997000
+    assert ask_ticks(mid, spread) == 3003002
+    assert bid_ticks(mid, 0) == ask_ticks(mid, 0) == mid
+
+
+def test_mid_ticks():
+    assert mid_ticks(2999999, 3000002) == 3000000
+
+
+def test_within():
+    assert within(1001, 1000, to_ppm(0.001))
+    assert not within(1002, 1000, to_ppm(0.001))
+    assert within(1000, 1000, 0)
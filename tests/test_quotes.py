@@ -0,0 +1,97 @@
+from example_rest_python.config import OrderStatus
+from example_rest_python.functions import BitwyreRestBot
+from example_rest_python.quotes import QuoteManager
+
+
+class FakeBot:
+    price_precision = 2
+    qty_precision = 2
+
+    def __init__(self):
+        self.open_bids = []
+        self.open_asks = []
+        self.cancelled = []
+        self.created = []
+
+    def prune_closed_orders(self):
+        pass
+
+    def choose_leverage(self):
+        return 1
+
+    def cancel_order(self, order_id, qty):
+        self.cancelled.append(order_id)
+        return (True, {})
+
+    def create_order(self, side, ordtype, orderqty, price, leverage):
+        self.created.append((side, price, orderqty))
+
+
+def order(orderid, price, leavesqty="0.50"):
+    return {"orderid": orderid, "price": price, "leavesqty": leavesqty}
+
+
+def test_diff_keeps_orders_within_tolerance():
+    manager = QuoteManager(FakeBot(), price_tolerance=0.001, qty_tolerance=0.1)
+    live = [order("near", "30010.00"), order("far", "30100.00"), order("small", "30000.00", "0.10")]
+
+    keep, creates, cancels = manager.diff([(3000000, 50)], live)
+
+    assert [o["orderid"] for o in keep] == ["near"]
+    assert creates == []
+    assert sorted(o["orderid"] for o in cancels) == ["far", "small"]
+
+
+def test_sync_sends_only_missing_levels_and_skips_pending_cancels():
+    bot = FakeBot()
+    bot.open_bids = [order("keep", "29970.00"), order("stale", "29000.00")]
+    manager = QuoteManager(bot, price_tolerance=0.001, qty_tolerance=0.1)
+
+    manager.sync(bids=[(2997000, 50)], asks=[(3003000, 50)])
+    assert bot.cancelled == ["stale"]
+    assert bot.created == [(2, "30030.00", "0.50")]
+
+    bot.cancelled.clear()
+    bot.created.clear()
+    manager.sync(bids=[(2997000, 50)], asks=[])
+    assert bot.cancelled == []
+    assert bot.created == []
+
+
+def spot_bot(quote_levels=1):
+    bot = BitwyreRestBot("btc_usdt_spot", 30000, 0.5, 2, 2, 0.001, 0.01, quote_levels=quote_levels)
+    bot.created = []
+    bot.cancelled = []
+    bot.create_order = lambda **order: bot.created.append(order)
+    bot.cancel_order = lambda order_id, qty: bot.cancelled.append(order_id) or (True, {})
+    return bot
+
+
+def test_build_quotes_spaces_levels_from_min_to_max_spread():
+    assert spot_bot(1).build_quotes() == ([(2997000, 50)], [(3003000, 50)])
+    bids, asks = spot_bot(3).build_quotes()
+    assert [price for price, _ in bids] == [2997000, 2983500, 2970000]
+    assert [price for price, _ in asks] == [3003000, 3016500, 3030000]
+
+
+def test_requote_archives_filled_orders_instead_of_cancelling_them():
+    bot = spot_bot()
+    filled = dict(order("filled", "29970.00", "0"), ordstatus=OrderStatus.Filled.value)
+    bot.open_bids = [filled]
+
+    bot.requote()
+
+    assert bot.cancelled == []
+    assert bot.closed_bids == [filled]
+    assert bot.open_bids == []
+
+
+def test_partially_cancelled_orders_stay_live():
+    bot = spot_bot()
+    partial = dict(order("partial", "29000.00", "0.20"), ordstatus=OrderStatus.PartialCancel.value)
+    bot.open_bids = [partial]
+
+    bot.requote()
+
+    assert bot.cancelled == ["partial"]
+    assert bot.closed_bids == []